@@ -0,0 +1,52 @@
+"""启动耗时基准 - 防止引擎模块的导入开销回退
+
+用法: python benchmarks/startup.py [--runs N] [--budget 秒]
+
+NumPy是引擎必需的依赖，其导入耗时随机器和版本变化较大，因此在同一子进程内
+先导入NumPy，再用perf_counter只计量引擎模块自身的导入耗时，多次运行取最小值。
+禁止加载SciPy/Tk的约束由 tests/test_startup.py 检查。
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+ENGINE_MODULES = ['cell_core', 'rules', 'patterns', 'census', 'export']
+
+# 每次运行都使用全新的解释器，避免模块缓存影响计时
+_TIMING_CODE = (
+  "import time\n"
+  "import numpy\n"
+  "start = time.perf_counter()\n"
+  f"import {', '.join(ENGINE_MODULES)}\n"
+  "print(time.perf_counter() - start)\n"
+)
+
+
+def time_engine_import(runs: int) -> float:
+  """多次运行取引擎模块导入的最小耗时"""
+  best = float('inf')
+  for _ in range(runs):
+    result = subprocess.run([sys.executable, '-c', _TIMING_CODE], cwd=SRC_DIR, check=True,
+                            capture_output=True, text=True)
+    best = min(best, float(result.stdout))
+  return best
+
+
+def main():
+  parser = argparse.ArgumentParser(description="引擎启动耗时基准")
+  parser.add_argument('--runs', type=int, default=10, help="重复次数")
+  parser.add_argument('--budget', type=float, default=0.025, help="引擎导入耗时上限（秒，不含解释器启动与NumPy导入）")
+  args = parser.parse_args()
+
+  cost = time_engine_import(args.runs)
+  print(f"引擎模块导入: {cost * 1000:.1f} ms (上限 {args.budget * 1000:.0f} ms)")
+  if cost > args.budget:
+    print("失败: 引擎导入耗时超出上限")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+  main()
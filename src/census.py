@@ -0,0 +1,199 @@
+import hashlib
+import struct
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from patterns import PRESET_PATTERNS, evolve_array, load_pattern_file
+from rules import PRESET_RULES
+
+
+# 常见静物，预设图案中没有收录
+COMMON_OBJECTS = {
+  "方块": [(0, 0), (1, 0), (0, 1), (1, 1)],
+  "蜂巢": [(1, 0), (2, 0), (0, 1), (3, 1), (1, 2), (2, 2)],
+  "面包": [(1, 0), (2, 0), (0, 1), (3, 1), (1, 2), (3, 2), (2, 3)],
+  "船": [(0, 0), (1, 0), (0, 1), (2, 1), (1, 2)],
+  "浴缸": [(1, 0), (0, 1), (2, 1), (1, 2)],
+  "池塘": [(1, 0), (2, 0), (0, 1), (3, 1), (0, 2), (3, 2), (1, 3), (2, 3)],
+}
+
+UNKNOWN = "未知"
+
+
+def _ndimage():
+  """按需导入 scipy.ndimage，避免导入本模块时支付SciPy的加载开销"""
+  from scipy import ndimage
+  return ndimage
+
+
+def canonical_key(cells: np.ndarray) -> bytes:
+  """计算形状在旋转与镜像下的规范哈希"""
+  cells = cells.astype(bool, copy=False)
+  best = None
+  for base in (cells, cells.T):
+    for variant in (base, base[::-1], base[:, ::-1], base[::-1, ::-1]):
+      form = struct.pack('<II', *variant.shape) + np.packbits(variant).tobytes()
+      if best is None or form < best:
+        best = form
+  return hashlib.blake2b(best, digest_size=8).digest()
+
+
+def _cells_to_array(cells: Iterable[Tuple[int, int]]) -> np.ndarray:
+  """坐标列表转换为紧凑的布尔数组"""
+  coords = np.array(list(cells), dtype=np.intp).reshape(-1, 2)
+  coords -= coords.min(axis=0)
+  array = np.zeros((coords[:, 1].max() + 1, coords[:, 0].max() + 1), dtype=bool)
+  array[coords[:, 1], coords[:, 0]] = True
+  return array
+
+
+def _trim(array: np.ndarray) -> np.ndarray:
+  """裁剪到活细胞包围盒"""
+  ys, xs = np.nonzero(array)
+  return array[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+
+
+def label_objects(grid: np.ndarray, spacing: int = 1) -> Tuple[np.ndarray, int]:
+  """连通分量标记；切比雪夫距离不超过 spacing+1 的活细胞归为同一对象"""
+  live = grid > 0
+  merged = live.copy()
+  # 向右下各膨胀spacing格后再做8连通标记，等价于按距离聚类
+  for _ in range(spacing):
+    merged[:-1] |= merged[1:]
+  for _ in range(spacing):
+    merged[:, :-1] |= merged[:, 1:]
+  labels, count = _ndimage().label(merged, structure=np.ones((3, 3), dtype=bool))
+  labels[~live] = 0
+  return labels, count
+
+
+class PatternLibrary:
+  """图案索引库 - 以规范哈希为键"""
+
+  def __init__(self, spacing: int = 1):
+    self.spacing = spacing
+    self.index = {}
+
+  def add(self, name: str, cells, rule: Optional[Dict] = None, max_period: int = 8) -> bool:
+    """登记图案（布尔数组或坐标列表）；若在max_period内回到自身形状（振荡器/飞船），同时登记所有相位"""
+    if isinstance(cells, np.ndarray) and cells.dtype == bool:
+      array = _trim(cells)
+    else:
+      array = _cells_to_array(cells)
+    if label_objects(array, self.spacing)[1] != 1:
+      return False
+
+    rule = rule or PRESET_RULES["康威生命"]
+    phases = [array]
+    key = canonical_key(array)
+    current = array
+    periodic = False
+    for _ in range(max_period):
+      current = evolve_array(current, rule)
+      if not current.any():
+        break
+      current = _trim(current)
+      if canonical_key(current) == key:
+        periodic = True
+        break
+      phases.append(current)
+    if not periodic:
+      phases = phases[:1]
+
+    for phase in phases:
+      self.index.setdefault(canonical_key(phase), name)
+    return True
+
+  def add_file(self, path: str, name: Optional[str] = None) -> bool:
+    """从 .rle/.cells 文件登记图案"""
+    if name is None:
+      name = path.replace('\\', '/').rsplit('/', 1)[-1].rsplit('.', 1)[0]
+    return self.add(name, load_pattern_file(path))
+
+  def lookup(self, cells: np.ndarray) -> Optional[str]:
+    """查找形状对应的图案名"""
+    return self.index.get(canonical_key(cells))
+
+  @classmethod
+  def default(cls, spacing: int = 1) -> 'PatternLibrary':
+    """由常见静物与预设图案构建的默认库"""
+    library = cls(spacing)
+    for name, cells in COMMON_OBJECTS.items():
+      library.add(name, cells)
+    for name, pattern in PRESET_PATTERNS.items():
+      # 由多个对象组成的预设（如滑翔机枪）不登记
+      if pattern is not None:
+        library.add(name, pattern.cells)
+    return library
+
+
+_default_library = None
+
+
+def get_default_library() -> PatternLibrary:
+  """获取（缓存的）默认图案库"""
+  global _default_library
+  if _default_library is None:
+    _default_library = PatternLibrary.default()
+  return _default_library
+
+
+def _unpack_mask(mask: int) -> np.ndarray:
+  """将8x8位掩码还原为布尔数组"""
+  bits = np.array([(mask >> i) & 1 for i in range(64)], dtype=bool).reshape(8, 8)
+  return _trim(bits)
+
+
+def census(grid: np.ndarray, library: Optional[PatternLibrary] = None, with_objects: bool = False) -> Dict:
+  """统计网格上的对象，返回各图案计数及（可选）对象列表"""
+  library = library or get_default_library()
+  labels, count = label_objects(grid, library.spacing)
+  ys, xs = np.nonzero(labels)
+  ids = labels[ys, xs]
+
+  # 各对象的包围盒与细胞数
+  y0 = np.full(count + 1, grid.shape[0], dtype=np.intp)
+  x0 = np.full(count + 1, grid.shape[1], dtype=np.intp)
+  y1 = np.zeros(count + 1, dtype=np.intp)
+  x1 = np.zeros(count + 1, dtype=np.intp)
+  np.minimum.at(y0, ids, ys)
+  np.minimum.at(x0, ids, xs)
+  np.maximum.at(y1, ids, ys)
+  np.maximum.at(x1, ids, xs)
+  population = np.bincount(ids, minlength=count + 1)
+  height = y1 - y0 + 1
+  width = x1 - x0 + 1
+  valid = population > 0
+
+  # 8x8以内的对象编码为64位掩码，整体去重后每种形状只查一次表
+  small = valid & (height <= 8) & (width <= 8)
+  cell_small = small[ids]
+  offsets = ((ys - y0[ids]) * 8 + (xs - x0[ids]))[cell_small].astype(np.uint64)
+  masks = np.zeros(count + 1, dtype=np.uint64)
+  np.bitwise_or.at(masks, ids[cell_small], np.left_shift(np.uint64(1), offsets))
+
+  names = np.empty(count + 1, dtype=object)
+  small_ids = np.nonzero(small)[0]
+  shapes, inverse = np.unique(masks[small_ids], return_inverse=True)
+  shape_names = np.array([library.lookup(_unpack_mask(int(m))) or UNKNOWN for m in shapes], dtype=object)
+  names[small_ids] = shape_names[inverse]
+
+  # 较大的对象逐个处理，通常数量很少
+  for label in np.nonzero(valid & ~small)[0]:
+    patch = labels[y0[label]:y1[label] + 1, x0[label]:x1[label] + 1] == label
+    names[label] = library.lookup(patch) or UNKNOWN
+
+  object_ids = np.nonzero(valid)[0]
+  counts = dict(Counter(names[object_ids].tolist()).most_common())
+  result = {'objects_total': len(object_ids), 'counts': counts}
+  if with_objects:
+    result['objects'] = [
+      {'name': name, 'x': x, 'y': y, 'width': w, 'height': h, 'population': p}
+      for name, x, y, w, h, p in zip(
+        names[object_ids].tolist(), x0[object_ids].tolist(), y0[object_ids].tolist(),
+        width[object_ids].tolist(), height[object_ids].tolist(), population[object_ids].tolist()
+      )
+    ]
+  return result
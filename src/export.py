@@ -0,0 +1,298 @@
+import functools
+import numbers
+from collections import deque
+from typing import BinaryIO, Optional, Tuple, Union
+
+import numpy as np
+
+
+# 调色板：索引0为死细胞（白），索引1为活细胞（黑），与界面配色一致
+DEFAULT_PALETTE = ((255, 255, 255), (0, 0, 0))
+
+
+class FrameRenderer:
+  """帧渲染器 - 直接用NumPy从网格生成帧，不依赖Tk"""
+
+  def __init__(self, region: Optional[Tuple[int, int, int, int]] = None, scale: int = 1):
+    if not isinstance(scale, numbers.Integral) or scale < 1:
+      raise ValueError("scale必须为正整数")
+    if region is not None and (region[2] <= 0 or region[3] <= 0):
+      raise ValueError("区域宽高必须为正数")
+    self.region = region
+    self.scale = int(scale)
+
+  def render(self, grid: np.ndarray) -> np.ndarray:
+    """渲染一帧，返回调色板索引数组 (uint8, 0/1)；区域超出网格的部分按死细胞填充"""
+    live = grid > 0
+    if self.region is not None:
+      x, y, w, h = self.region
+      frame = np.zeros((h, w), dtype=np.uint8)
+      height, width = live.shape
+      x0, y0 = max(0, x), max(0, y)
+      x1, y1 = min(width, x + w), min(height, y + h)
+      if x0 < x1 and y0 < y1:
+        frame[y0 - y:y1 - y, x0 - x:x1 - x] = live[y0:y1, x0:x1]
+    else:
+      frame = live.astype(np.uint8)
+    if self.scale > 1:
+      frame = np.repeat(np.repeat(frame, self.scale, axis=0), self.scale, axis=1)
+    return frame
+
+
+def _open_output(target: Union[str, BinaryIO]) -> Tuple[BinaryIO, bool]:
+  """打开输出目标，返回(文件对象, 是否由本模块负责关闭)"""
+  if isinstance(target, str):
+    return open(target, 'wb'), True
+  return target, False
+
+
+def _lzw_encode(data: bytes, min_code_size: int) -> bytes:
+  """GIF变长LZW编码"""
+  clear_code = 1 << min_code_size
+  end_code = clear_code + 1
+  code_size = min_code_size + 1
+  next_code = end_code + 1
+  table = {}
+  out = bytearray()
+  bit_buffer = 0
+  bit_count = 0
+
+  def emit(code):
+    nonlocal bit_buffer, bit_count
+    bit_buffer |= code << bit_count
+    bit_count += code_size
+    while bit_count >= 8:
+      out.append(bit_buffer & 0xFF)
+      bit_buffer >>= 8
+      bit_count -= 8
+
+  emit(clear_code)
+  if data:
+    prefix = data[0]
+    for k in data[1:]:
+      key = (prefix << 8) | k
+      code = table.get(key)
+      if code is not None:
+        prefix = code
+        continue
+      emit(prefix)
+      if next_code < 4096:
+        table[key] = next_code
+        next_code += 1
+        if next_code > (1 << code_size) and code_size < 12:
+          code_size += 1
+      else:
+        # 码表已满，发送清除码重新开始
+        emit(clear_code)
+        table.clear()
+        code_size = min_code_size + 1
+        next_code = end_code + 1
+      prefix = k
+    emit(prefix)
+  emit(end_code)
+  if bit_count > 0:
+    out.append(bit_buffer & 0xFF)
+  return bytes(out)
+
+
+def _encode_gif_frame(frame: np.ndarray, delay_cs: int, min_code_size: int) -> bytes:
+  """编码单帧：图形控制扩展 + 图像描述符 + LZW数据子块"""
+  height, width = frame.shape
+  # 图形控制扩展：帧间延迟
+  parts = [
+    b'\x21\xF9\x04\x00' + delay_cs.to_bytes(2, 'little') + b'\x00\x00',
+    b'\x2C' + bytes(4) + width.to_bytes(2, 'little') + height.to_bytes(2, 'little') + b'\x00',
+    bytes((min_code_size,)),
+  ]
+  data = _lzw_encode(np.ascontiguousarray(frame, dtype=np.uint8).tobytes(), min_code_size)
+  for i in range(0, len(data), 255):
+    block = data[i:i + 255]
+    parts.append(bytes((len(block),)) + block)
+  parts.append(b'\x00')
+  return b''.join(parts)
+
+
+def _encode_raw_frame(frame: np.ndarray, lut: np.ndarray) -> bytes:
+  """按查找表将调色板索引转换为像素字节"""
+  return lut[frame].tobytes()
+
+
+class GifWriter:
+  """最小化的GIF89a动画编码器"""
+
+  MIN_CODE_SIZE = 2
+
+  def __init__(self, target: Union[str, BinaryIO], delay_ms: int = 100, loop: int = 0, palette=DEFAULT_PALETTE):
+    if not 1 <= len(palette) <= 4:
+      raise ValueError("调色板颜色数必须在1-4之间")
+    self.stream, self._owns_stream = _open_output(target)
+    self.delay_cs = max(1, delay_ms // 10)
+    self.loop = loop
+    self.palette = palette
+    self.size = None
+
+  def _write_header(self, width: int, height: int):
+    """写入文件头、全局调色板和循环扩展"""
+    self.size = (width, height)
+    color_table = bytearray()
+    for r, g, b in self.palette:
+      color_table += bytes((r, g, b))
+    color_table += bytes(12 - len(color_table))
+    self.stream.write(b'GIF89a')
+    # 全局调色板标志 + 颜色深度 + 4色调色板
+    self.stream.write(width.to_bytes(2, 'little') + height.to_bytes(2, 'little') + bytes((0xF1, 0, 0)))
+    self.stream.write(bytes(color_table))
+    self.stream.write(b'\x21\xFF\x0BNETSCAPE2.0\x03\x01' + self.loop.to_bytes(2, 'little') + b'\x00')
+
+  @property
+  def encoder(self):
+    """可在子进程中调用的帧编码函数"""
+    return functools.partial(_encode_gif_frame, delay_cs=self.delay_cs, min_code_size=self.MIN_CODE_SIZE)
+
+  def write_encoded(self, shape: Tuple[int, int], data: bytes):
+    """写入已编码的一帧"""
+    height, width = shape
+    if self.size is None:
+      self._write_header(width, height)
+    elif self.size != (width, height):
+      raise ValueError("所有帧的尺寸必须一致")
+    self.stream.write(data)
+
+  def write_frame(self, frame: np.ndarray):
+    """编码并写入一帧调色板索引"""
+    self.write_encoded(frame.shape, self.encoder(frame))
+
+  def close(self):
+    """写入结束符并关闭"""
+    if self.size is not None:
+      self.stream.write(b'\x3B')
+    self.stream.flush()
+    if self._owns_stream:
+      self.stream.close()
+
+
+class RawFrameWriter:
+  """原始帧流写入器 - 输出gray8或rgb24字节流，可直接接入ffmpeg管道"""
+
+  def __init__(self, target: Union[str, BinaryIO], pixel_format: str = 'gray', palette=DEFAULT_PALETTE):
+    if pixel_format == 'gray':
+      lut = [round(0.299 * r + 0.587 * g + 0.114 * b) for r, g, b in palette]
+    elif pixel_format == 'rgb24':
+      lut = list(palette)
+    else:
+      raise ValueError(f"不支持的像素格式: {pixel_format}")
+    self.stream, self._owns_stream = _open_output(target)
+    self.pixel_format = pixel_format
+    self.lut = np.array(lut, dtype=np.uint8)
+    self.size = None
+
+  @property
+  def encoder(self):
+    """可在子进程中调用的帧编码函数"""
+    return functools.partial(_encode_raw_frame, lut=self.lut)
+
+  def write_encoded(self, shape: Tuple[int, int], data: bytes):
+    """写入已编码的一帧"""
+    height, width = shape
+    if self.size is None:
+      self.size = (width, height)
+    elif self.size != (width, height):
+      raise ValueError("所有帧的尺寸必须一致")
+    self.stream.write(data)
+
+  def write_frame(self, frame: np.ndarray):
+    """写入一帧"""
+    self.write_encoded(frame.shape, self.encoder(frame))
+
+  def close(self):
+    """刷新并关闭"""
+    self.stream.flush()
+    if self._owns_stream:
+      self.stream.close()
+
+
+class FrameExporter:
+  """帧导出管线 - 在调用方渲染，在子进程中编码，写入顺序与提交顺序一致
+
+  编码在独立进程中进行，不与步进争用GIL；未完成的帧数不超过queue_size，
+  超出时submit会等待最早的一帧编码完成并写出。
+  """
+
+  def __init__(self, writer, renderer: Optional[FrameRenderer] = None, every: int = 1,
+               queue_size: int = 8, workers: int = 1):
+    if every < 1:
+      raise ValueError("every必须为正整数")
+    if queue_size < 1 or workers < 1:
+      raise ValueError("queue_size与workers必须为正整数")
+    self.writer = writer
+    self.renderer = renderer or FrameRenderer()
+    self.every = every
+    self.queue_size = queue_size
+    self.frame_index = 0
+    self.frames_written = 0
+    self._encoder = writer.encoder
+    self._pending = deque()
+    # 进程池仅在导出时才需要，避免导入本模块时加载multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    self._pool = ProcessPoolExecutor(max_workers=workers)
+    self._closed = False
+
+  def _write_oldest(self):
+    """等待最早提交的帧编码完成并写出"""
+    shape, future = self._pending.popleft()
+    self.writer.write_encoded(shape, future.result())
+    self.frames_written += 1
+
+  def submit(self, grid: np.ndarray) -> bool:
+    """提交当前网格，按every跳帧；返回是否被采样。队列满时阻塞"""
+    if self._closed:
+      raise RuntimeError("导出管线已关闭")
+    index = self.frame_index
+    self.frame_index += 1
+    if index % self.every:
+      return False
+    # 先写出已完成的帧，队列满时再等待
+    while self._pending and (self._pending[0][1].done() or len(self._pending) >= self.queue_size):
+      self._write_oldest()
+    # 渲染结果是新数组，网格后续的原地修改不会影响队列中的帧
+    frame = self.renderer.render(grid)
+    self._pending.append((frame.shape, self._pool.submit(self._encoder, frame)))
+    return True
+
+  def close(self):
+    """写出剩余的帧并关闭写入器"""
+    if self._closed:
+      return
+    self._closed = True
+    try:
+      while self._pending:
+        self._write_oldest()
+    finally:
+      for _, future in self._pending:
+        future.cancel()
+      self._pool.shutdown()
+      self.writer.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc, tb):
+    self.close()
+
+
+def export_run(ca, steps: int, writer, every: int = 1,
+               region: Optional[Tuple[int, int, int, int]] = None, scale: int = 1,
+               queue_size: int = 8, workers: int = 1) -> int:
+  """推进ca共steps步并导出帧（包含初始帧），返回写入的帧数"""
+  try:
+    exporter = FrameExporter(writer, FrameRenderer(region, scale), every, queue_size, workers)
+  except BaseException:
+    # 管线未建立时写入器仍归调用方所有的资源，需在此关闭
+    writer.close()
+    raise
+  with exporter:
+    exporter.submit(ca.grid)
+    for _ in range(steps):
+      ca.step()
+      exporter.submit(ca.grid)
+  return exporter.frames_written
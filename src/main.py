@@ -146,6 +146,7 @@ class CellularAutomatonGUI:
     ttk.Button(button_frame, text="开始/暂停", command=self.toggle_run).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="单步", command=self.step).pack(side=tk.LEFT, padx=5)
     ttk.Button(button_frame, text="清空", command=self.clear).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="对象统计", command=self.show_census).pack(side=tk.LEFT, padx=5)
 
     # 状态栏
     self.status_var = tk.StringVar(value="就绪 | 速度: 10 步")
@@ -343,12 +344,13 @@ class CellularAutomatonGUI:
     else:
       # 使用uint8类型确保一致性
       grid = np.zeros((self.ca.height, self.ca.width), dtype=np.uint8)
-      center_x = self.ca.width // 2 - 6
-      center_y = self.ca.height // 2 - 6
 
-      pattern_func = self.preset_patterns[pattern_name]
-      if pattern_func:
-        pattern_func(grid, center_x, center_y, self.ca.width, self.ca.height)
+      pattern = self.preset_patterns[pattern_name]
+      if pattern:
+        # 按图案自身尺寸居中放置
+        center_x = (self.ca.width - pattern.width) // 2
+        center_y = (self.ca.height - pattern.height) // 2
+        pattern.stamp(grid, center_x, center_y)
         self.ca.grid = grid
 
     self.draw_grid()
@@ -429,6 +431,17 @@ class CellularAutomatonGUI:
       except Exception as e:
         messagebox.showerror("错误", f"加载失败: {str(e)}")
 
+  def show_census(self):
+    """统计当前网格上的对象"""
+    # 统计依赖SciPy，首次使用时再导入
+    from census import census
+    result = census(self.ca.grid)
+    if not result['objects_total']:
+      messagebox.showinfo("对象统计", "网格上没有对象")
+      return
+    lines = [f"{name}: {count}" for name, count in result['counts'].items()]
+    messagebox.showinfo("对象统计", f"共 {result['objects_total']} 个对象\n\n" + "\n".join(lines))
+
   def on_canvas_click(self, event):
     """处理鼠标点击"""
     if self.running:
@@ -1,156 +1,311 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# 边界模式：fixed 丢弃越界细胞（与引擎的非循环边界一致），wrap 按环面回绕
+BOUNDARY_MODES = ('fixed', 'wrap')
+
+CONWAY_RULE = {'survive': [2, 3], 'birth': [3], 'states': 2, 'neighborhood': 'moore'}
+
+
+def evolve_array(array: np.ndarray, rule: Optional[Dict] = None, generations: int = 1) -> np.ndarray:
+  """在无限平面上演化布尔数组，每代向四周扩展一格"""
+  rule = rule or CONWAY_RULE
+  survive = np.zeros(9, dtype=bool)
+  birth = np.zeros(9, dtype=bool)
+  survive[list(rule['survive'])] = True
+  birth[list(rule['birth'])] = True
+  if rule.get('neighborhood', 'moore') == 'moore':
+    offsets = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+  else:
+    offsets = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+  array = array.astype(bool)
+  for _ in range(generations):
+    padded = np.pad(array, 2)
+    h, w = padded.shape
+    neighbors = np.zeros((h - 2, w - 2), dtype=np.uint8)
+    for dy, dx in offsets:
+      neighbors += padded[1 + dy:h - 1 + dy, 1 + dx:w - 1 + dx]
+    alive = padded[1:-1, 1:-1]
+    array = np.where(alive, survive[neighbors], birth[neighbors])
+  return array
+
+
+def scatter_cells(grid: np.ndarray, coords: np.ndarray, boundary: str = 'fixed', value: int = 1):
+  """将(x, y)坐标数组一次性写入网格"""
+  if boundary not in BOUNDARY_MODES:
+    raise ValueError(f"不支持的边界模式: {boundary}")
+  height, width = grid.shape
+  xs = coords[:, 0]
+  ys = coords[:, 1]
+  if boundary == 'wrap':
+    xs = xs % width
+    ys = ys % height
+  else:
+    inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+    xs = xs[inside]
+    ys = ys[inside]
+  grid[ys, xs] = value
+
+
+class Pattern:
+  """图案 - 预计算的坐标数组，缓存旋转/镜像及演化相位变体"""
+
+  def __init__(self, cells):
+    self.cells = np.array(cells, dtype=np.intp).reshape(-1, 2)
+    self.cells.setflags(write=False)
+    self.width = int(self.cells[:, 0].max()) + 1
+    self.height = int(self.cells[:, 1].max()) + 1
+    self._variants = {}
+
+  def __call__(self, grid, center_x, center_y, width, height):
+    """兼容 Patterns.create_* 的调用方式"""
+    self.stamp(grid[:height, :width], center_x, center_y)
+
+  def _transform(self, transform: int) -> np.ndarray:
+    """变换编号 0-3 为顺时针旋转 transform*90°，4-7 在旋转后再水平镜像"""
+    xs = self.cells[:, 0]
+    ys = self.cells[:, 1]
+    w, h = self.width, self.height
+    for _ in range(transform % 4):
+      xs, ys = h - 1 - ys, xs
+      w, h = h, w
+    if transform >= 4:
+      xs = w - 1 - xs
+    return np.stack([xs, ys], axis=1)
+
+  @staticmethod
+  def _rule_key(rule: Optional[Dict]):
+    rule = rule or CONWAY_RULE
+    return tuple(rule['survive']), tuple(rule['birth']), rule.get('neighborhood', 'moore')
+
+  def variant(self, transform: int = 0, phase: int = 0, rule: Optional[Dict] = None) -> np.ndarray:
+    """获取变换并演化phase代后的坐标数组（坐标相对变换后的原点，可能为负）"""
+    if not 0 <= transform < 8:
+      raise ValueError("变换编号必须在0-7之间")
+    if phase < 0:
+      raise ValueError("相位不能为负数")
+    key = (transform, phase, self._rule_key(rule) if phase else None)
+    cells = self._variants.get(key)
+    if cells is None:
+      cells = self._transform(transform)
+      if phase:
+        array = np.zeros((cells[:, 1].max() + 1, cells[:, 0].max() + 1), dtype=bool)
+        array[cells[:, 1], cells[:, 0]] = True
+        ys, xs = np.nonzero(evolve_array(array, rule, phase))
+        # 每代向四周扩展一格，换算回原坐标系
+        cells = np.stack([xs - phase, ys - phase], axis=1)
+      cells.setflags(write=False)
+      self._variants[key] = cells
+    return cells
+
+  def stamp(self, grid: np.ndarray, x: int, y: int, transform: int = 0, phase: int = 0,
+            boundary: str = 'fixed', rule: Optional[Dict] = None):
+    """在(x, y)处放置单个图案"""
+    scatter_cells(grid, self.variant(transform, phase, rule) + (x, y), boundary)
+
+  def stamp_many(self, grid: np.ndarray, positions, transforms=0, phases=0,
+                 boundary: str = 'fixed', rule: Optional[Dict] = None):
+    """批量放置图案：positions 为 (N, 2) 的 (x, y) 数组，transforms/phases 为标量或长度N的数组"""
+    positions = np.asarray(positions, dtype=np.intp).reshape(-1, 2)
+    count = len(positions)
+    transforms = np.broadcast_to(np.asarray(transforms, dtype=np.intp), count)
+    phases = np.broadcast_to(np.asarray(phases, dtype=np.intp), count)
+    if ((transforms < 0) | (transforms >= 8)).any():
+      raise ValueError("变换编号必须在0-7之间")
+    if (phases < 0).any():
+      raise ValueError("相位不能为负数")
+
+    # 按(变换, 相位)分组，每组一次广播展开
+    group_keys = phases * 8 + transforms
+    chunks = []
+    for key in np.unique(group_keys).tolist():
+      selected = positions[group_keys == key]
+      cells = self.variant(key % 8, key // 8, rule)
+      chunks.append((selected[:, None, :] + cells[None, :, :]).reshape(-1, 2))
+    if chunks:
+      scatter_cells(grid, np.concatenate(chunks), boundary)
+
+
+GLIDER = Pattern([(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)])
+PULSAR = Pattern([
+  # 左上角
+  (2, 0), (3, 0), (4, 0),
+  (0, 2), (0, 3), (0, 4),
+  (5, 2), (5, 3), (5, 4),
+  (2, 5), (3, 5), (4, 5),
+  # 右上角
+  (8, 0), (9, 0), (10, 0),
+  (7, 2), (7, 3), (7, 4),
+  (12, 2), (12, 3), (12, 4),
+  (8, 5), (9, 5), (10, 5),
+  # 左下角
+  (2, 7), (3, 7), (4, 7),
+  (0, 8), (0, 9), (0, 10),
+  (5, 8), (5, 9), (5, 10),
+  (2, 12), (3, 12), (4, 12),
+  # 右下角
+  (8, 7), (9, 7), (10, 7),
+  (7, 8), (7, 9), (7, 10),
+  (12, 8), (12, 9), (12, 10),
+  (8, 12), (9, 12), (10, 12)
+])
+GOSPER_GLIDER_GUN = Pattern([
+  (24, 0),
+  (22, 1), (24, 1),
+  (12, 2), (13, 2), (20, 2), (21, 2), (34, 2), (35, 2),
+  (11, 3), (15, 3), (20, 3), (21, 3), (34, 3), (35, 3),
+  (0, 4), (1, 4), (10, 4), (16, 4), (20, 4), (21, 4),
+  (0, 5), (1, 5), (10, 5), (14, 5), (16, 5), (17, 5), (22, 5), (24, 5),
+  (10, 6), (16, 6), (24, 6),
+  (11, 7), (15, 7),
+  (12, 8), (13, 8)
+])
+BLINKER = Pattern([(1, 0), (1, 1), (1, 2)])
+TOAD = Pattern([(1, 0), (2, 0), (3, 0), (0, 1), (1, 1), (2, 1)])
+BEACON = Pattern([(0, 0), (1, 0), (0, 1), (3, 2), (2, 3), (3, 3)])
+R_PENTOMINO = Pattern([(1, 0), (2, 0), (0, 1), (1, 1), (1, 2)])
+ACORN = Pattern([(1, 0), (3, 1), (0, 2), (1, 2), (4, 2), (5, 2), (6, 2)])
+DIEHARD = Pattern([
+  (6, 0),
+  (0, 1), (1, 1),
+  (1, 2), (5, 2), (6, 2), (7, 2)
+])
+GLIDER_COLLISION = Pattern([
+  (0, 1), (1, 2), (2, 0), (2, 1), (2, 2),
+  (10, 1), (9, 2), (8, 0), (8, 1), (8, 2)
+])
+GLIDER_FLEET = Pattern([
+  (0, 1), (1, 2), (2, 0), (2, 1), (2, 2),
+  (10, 1), (9, 2), (8, 0), (8, 1), (8, 2),
+  (5, 8), (4, 9), (4, 10), (5, 10), (6, 10)
+])
+
+
 class Patterns:
   """预设图案类"""
 
   @staticmethod
   def create_glider(grid, center_x, center_y, width, height):
     """滑翔机 - 康威生命游戏经典图案"""
-    pattern = [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]
-    for dx, dy in pattern:
-      x, y = center_x + dx, center_y + dy
-      if 0 <= x < width and 0 <= y < height:
-        grid[y, x] = 1
+    GLIDER(grid, center_x, center_y, width, height)
 
   @staticmethod
   def create_pulsar(grid, center_x, center_y, width, height):
     """脉冲星 - 周期3振荡器"""
-    pattern = [
-      # 左上角
-      (2, 0), (3, 0), (4, 0),
-      (0, 2), (0, 3), (0, 4),
-      (5, 2), (5, 3), (5, 4),
-      (2, 5), (3, 5), (4, 5),
-      # 右上角
-      (8, 0), (9, 0), (10, 0),
-      (7, 2), (7, 3), (7, 4),
-      (12, 2), (12, 3), (12, 4),
-      (8, 5), (9, 5), (10, 5),
-      # 左下角
-      (2, 7), (3, 7), (4, 7),
-      (0, 8), (0, 9), (0, 10),
-      (5, 8), (5, 9), (5, 10),
-      (2, 12), (3, 12), (4, 12),
-      # 右下角
-      (8, 7), (9, 7), (10, 7),
-      (7, 8), (7, 9), (7, 10),
-      (12, 8), (12, 9), (12, 10),
-      (8, 12), (9, 12), (10, 12)
-    ]
-    for dx, dy in pattern:
-      x, y = center_x + dx, center_y + dy
-      if 0 <= x < width and 0 <= y < height:
-        grid[y, x] = 1
+    PULSAR(grid, center_x, center_y, width, height)
 
   @staticmethod
   def create_gosper_glider_gun(grid, center_x, center_y, width, height):
     """高斯帕滑翔机枪"""
-    pattern = [
-      (24, 0),
-      (22, 1), (24, 1),
-      (12, 2), (13, 2), (20, 2), (21, 2), (34, 2), (35, 2),
-      (11, 3), (15, 3), (20, 3), (21, 3), (34, 3), (35, 3),
-      (0, 4), (1, 4), (10, 4), (16, 4), (20, 4), (21, 4),
-      (0, 5), (1, 5), (10, 5), (14, 5), (16, 5), (17, 5), (22, 5), (24, 5),
-      (10, 6), (16, 6), (24, 6),
-      (11, 7), (15, 7),
-      (12, 8), (13, 8)
-    ]
-    for dx, dy in pattern:
-      x, y = center_x + dx, center_y + dy
-      if 0 <= x < width and 0 <= y < height:
-        grid[y, x] = 1
+    GOSPER_GLIDER_GUN(grid, center_x, center_y, width, height)
 
   @staticmethod
   def create_blinker(grid, center_x, center_y, width, height):
     """眨眼 - 周期2振荡器"""
-    pattern = [(1, 0), (1, 1), (1, 2)]
-    for dx, dy in pattern:
-      x, y = center_x + dx, center_y + dy
-      if 0 <= x < width and 0 <= y < height:
-        grid[y, x] = 1
+    BLINKER(grid, center_x, center_y, width, height)
 
   @staticmethod
   def create_toad(grid, center_x, center_y, width, height):
     """吐司 - 周期2振荡器"""
-    pattern = [(1, 0), (2, 0), (3, 0), (0, 1), (1, 1), (2, 1)]
-    for dx, dy in pattern:
-      x, y = center_x + dx, center_y + dy
-      if 0 <= x < width and 0 <= y < height:
-        grid[y, x] = 1
+    TOAD(grid, center_x, center_y, width, height)
 
   @staticmethod
   def create_beacon(grid, center_x, center_y, width, height):
     """信标 - 周期2振荡器"""
-    pattern = [(0, 0), (1, 0), (0, 1), (3, 2), (2, 3), (3, 3)]
-    for dx, dy in pattern:
-      x, y = center_x + dx, center_y + dy
-      if 0 <= x < width and 0 <= y < height:
-        grid[y, x] = 1
+    BEACON(grid, center_x, center_y, width, height)
 
   @staticmethod
   def create_r_pentomino(grid, center_x, center_y, width, height):
     """R-五连方"""
-    pattern = [(1, 0), (2, 0), (0, 1), (1, 1), (1, 2)]
-    for dx, dy in pattern:
-      x, y = center_x + dx, center_y + dy
-      if 0 <= x < width and 0 <= y < height:
-        grid[y, x] = 1
+    R_PENTOMINO(grid, center_x, center_y, width, height)
 
   @staticmethod
   def create_acorn(grid, center_x, center_y, width, height):
     """橡果"""
-    pattern = [(1, 0), (3, 1), (0, 2), (1, 2), (4, 2), (5, 2), (6, 2)]
-    for dx, dy in pattern:
-      x, y = center_x + dx, center_y + dy
-      if 0 <= x < width and 0 <= y < height:
-        grid[y, x] = 1
+    ACORN(grid, center_x, center_y, width, height)
 
   @staticmethod
   def create_diehard(grid, center_x, center_y, width, height):
     """Diehard"""
-    pattern = [
-      (6, 0),
-      (0, 1), (1, 1),
-      (1, 2), (5, 2), (6, 2), (7, 2)
-    ]
-    for dx, dy in pattern:
-      x, y = center_x + dx, center_y + dy
-      if 0 <= x < width and 0 <= y < height:
-        grid[y, x] = 1
+    DIEHARD(grid, center_x, center_y, width, height)
 
   @staticmethod
   def create_glider_collision(grid, center_x, center_y, width, height):
     """滑翔机对撞"""
-    glider1 = [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]
-    glider2 = [(10, 1), (9, 2), (8, 0), (8, 1), (8, 2)]
-    for dx, dy in glider1 + glider2:
-      x, y = center_x + dx, center_y + dy
-      if 0 <= x < width and 0 <= y < height:
-        grid[y, x] = 1
+    GLIDER_COLLISION(grid, center_x, center_y, width, height)
 
   @staticmethod
   def create_glider_fleet(grid, center_x, center_y, width, height):
     """滑翔机舰队"""
-    glider1 = [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]
-    glider2 = [(10, 1), (9, 2), (8, 0), (8, 1), (8, 2)]
-    glider3 = [(5, 8), (4, 9), (4, 10), (5, 10), (6, 10)]
-    for dx, dy in glider1 + glider2 + glider3:
-      x, y = center_x + dx, center_y + dy
-      if 0 <= x < width and 0 <= y < height:
-        grid[y, x] = 1
+    GLIDER_FLEET(grid, center_x, center_y, width, height)
 
 
 # 预设图案映射
 PRESET_PATTERNS = {
   "随机": None,
-  "滑翔机": Patterns.create_glider,
-  "滑翔机对撞": Patterns.create_glider_collision,
-  "滑翔机舰队": Patterns.create_glider_fleet,
-  "高斯帕滑翔机枪": Patterns.create_gosper_glider_gun,
-  "眨眼": Patterns.create_blinker,
-  "吐司": Patterns.create_toad,
-  "信标": Patterns.create_beacon,
-  "脉冲星": Patterns.create_pulsar,
-  "R-五连方": Patterns.create_r_pentomino,
-  "橡果": Patterns.create_acorn,
-  "Diehard": Patterns.create_diehard,
+  "滑翔机": GLIDER,
+  "滑翔机对撞": GLIDER_COLLISION,
+  "滑翔机舰队": GLIDER_FLEET,
+  "高斯帕滑翔机枪": GOSPER_GLIDER_GUN,
+  "眨眼": BLINKER,
+  "吐司": TOAD,
+  "信标": BEACON,
+  "脉冲星": PULSAR,
+  "R-五连方": R_PENTOMINO,
+  "橡果": ACORN,
+  "Diehard": DIEHARD,
 }
+
+
+def parse_rle(text: str) -> List[Tuple[int, int]]:
+  """解析RLE格式图案，返回(dx, dy)坐标列表"""
+  cells = []
+  x = y = 0
+  count = ''
+  for line in text.splitlines():
+    line = line.strip()
+    if not line or line.startswith('#') or re.match(r'x\s*=', line):
+      continue
+    for ch in line:
+      if ch.isdigit():
+        count += ch
+        continue
+      n = int(count) if count else 1
+      count = ''
+      if ch == 'b' or ch == '.':
+        x += n
+      elif ch == '$':
+        y += n
+        x = 0
+      elif ch == '!':
+        return cells
+      elif ch.isalpha():
+        cells.extend((x + i, y) for i in range(n))
+        x += n
+  return cells
+
+
+def parse_plaintext(text: str) -> List[Tuple[int, int]]:
+  """解析plaintext (.cells) 格式图案，返回(dx, dy)坐标列表"""
+  cells = []
+  y = 0
+  for line in text.splitlines():
+    if line.startswith('!'):
+      continue
+    cells.extend((x, y) for x, ch in enumerate(line) if ch in 'O*')
+    y += 1
+  return cells
+
+
+def load_pattern_file(path: str) -> List[Tuple[int, int]]:
+  """从文件加载图案，支持 .rle 与 .cells 格式"""
+  with open(path, 'r', encoding='utf-8') as f:
+    text = f.read()
+  if os.path.splitext(path)[1].lower() == '.rle':
+    return parse_rle(text)
+  return parse_plaintext(text)
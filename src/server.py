@@ -0,0 +1,454 @@
+"""元胞自动机远程控制服务
+
+基于asyncio，监听Unix套接字或本机TCP端口，可托管多个模拟实例。
+
+消息格式（请求与响应相同）：
+  4字节头部长度 + 4字节载荷长度（大端） + JSON头部 + 二进制载荷
+请求头部形如 {"id": 1, "cmd": "advance", "sim": 1, "steps": 10}，
+响应头部形如 {"id": 1, "ok": true, ...}，出错时为 {"id": 1, "ok": false, "error": "..."}。
+网格数据以 np.packbits 按行优先打包放在载荷中，头部的 shape 给出 [高, 宽]。
+"""
+import argparse
+import asyncio
+import json
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from cell_core import CellularAutomaton
+from patterns import PRESET_PATTERNS, Pattern
+from rules import PRESET_RULES
+
+_PREFIX = struct.Struct('>II')
+MAX_HEADER_SIZE = 1 << 20
+# CellularAutomaton.step 是逐格的纯Python循环，150x150 约0.07秒一步，
+# 512x512 约0.8秒一步；更大的网格单步就要数十秒，因此限制在512以内
+MAX_GRID_SIZE = 512
+# 载荷只有按位打包的网格，上限即最大网格打包后的字节数
+MAX_PAYLOAD_SIZE = (MAX_GRID_SIZE * MAX_GRID_SIZE + 7) // 8
+
+
+async def read_message(reader: asyncio.StreamReader) -> Tuple[Dict, bytes]:
+  """读取一条消息"""
+  header_size, payload_size = _PREFIX.unpack(await reader.readexactly(_PREFIX.size))
+  if header_size > MAX_HEADER_SIZE or payload_size > MAX_PAYLOAD_SIZE:
+    raise ValueError("消息过大")
+  header = json.loads(await reader.readexactly(header_size))
+  if not isinstance(header, dict):
+    raise ValueError("消息头部必须是JSON对象")
+  payload = await reader.readexactly(payload_size) if payload_size else b''
+  return header, payload
+
+
+def encode_message(header: Dict, payload: bytes = b'') -> bytes:
+  """编码一条消息"""
+  data = json.dumps(header, ensure_ascii=False).encode('utf-8')
+  return _PREFIX.pack(len(data), len(payload)) + data + payload
+
+
+def pack_grid(grid: np.ndarray) -> Tuple[Dict, bytes]:
+  """将网格按位打包，返回(头部字段, 载荷)"""
+  return {'shape': list(grid.shape), 'encoding': 'packbits'}, np.packbits(grid > 0).tobytes()
+
+
+def unpack_grid(header: Dict, payload: bytes, max_size: int = MAX_GRID_SIZE) -> np.ndarray:
+  """还原按位打包的网格；校验尺寸上限与载荷长度，避免按客户端给出的尺寸分配超大内存"""
+  shape = header.get('shape')
+  if not isinstance(shape, (list, tuple)) or len(shape) != 2 or not all(isinstance(v, int) for v in shape):
+    raise ValueError("shape必须是[高, 宽]两个整数")
+  height, width = shape
+  if not (1 <= height <= max_size and 1 <= width <= max_size):
+    raise ValueError(f"网格大小必须在1-{max_size}之间")
+  if len(payload) != (height * width + 7) // 8:
+    raise ValueError("载荷长度与shape不符")
+  bits = np.unpackbits(np.frombuffer(payload, dtype=np.uint8), count=height * width)
+  return bits.reshape(height, width)
+
+
+def validate_rule(rule) -> Dict:
+  """校验规则：预设名称或规则字典"""
+  if isinstance(rule, str):
+    if rule not in PRESET_RULES:
+      raise ValueError(f"未知规则: {rule}")
+    return PRESET_RULES[rule]
+  if not isinstance(rule, dict):
+    raise ValueError("规则必须是预设名称或字典")
+  survive = [int(x) for x in rule.get('survive', [])]
+  birth = [int(x) for x in rule.get('birth', [])]
+  neighborhood = rule.get('neighborhood', 'moore')
+  if not survive and not birth:
+    raise ValueError("生存条件和诞生条件不能同时为空")
+  if any(val < 0 or val > 8 for val in survive + birth):
+    raise ValueError("邻居数量必须在0-8之间")
+  if neighborhood not in ('moore', 'von_neumann'):
+    raise ValueError(f"未知邻域类型: {neighborhood}")
+  return {'survive': survive, 'birth': birth, 'states': 2, 'neighborhood': neighborhood}
+
+
+class Simulation:
+  """服务端托管的单个模拟实例"""
+
+  def __init__(self, sim_id: int, width: int, height: int):
+    self.id = sim_id
+    self.ca = CellularAutomaton(width, height)
+    self.generation = 0
+    self.fps = None
+    self.lock = asyncio.Lock()
+    self.run_task: Optional[asyncio.Task] = None
+    self.destroyed = False
+    self._stop = asyncio.Event()
+    # pause/destroy 时递增，进行中的 advance 据此在两步之间中止
+    self._epoch = 0
+
+  @property
+  def running(self) -> bool:
+    return self.run_task is not None and not self.run_task.done()
+
+  async def advance(self, steps: int) -> int:
+    """推进steps步，返回实际完成的步数
+
+    每步在工作线程中执行并短暂持锁，读取请求可穿插其间；
+    pause 或 destroy 会让进行中的 advance 在两步之间停止。
+    """
+    epoch = self._epoch
+    done = 0
+    while done < steps and epoch == self._epoch and not self.destroyed:
+      async with self.lock:
+        await asyncio.to_thread(self.ca.step)
+        self.generation += 1
+      done += 1
+    return done
+
+  async def _run_loop(self):
+    """持续运行，fps为None时全速推进"""
+    loop = asyncio.get_running_loop()
+    while not self._stop.is_set():
+      started = loop.time()
+      if not await self.advance(1):
+        break
+      if self.fps:
+        try:
+          await asyncio.wait_for(self._stop.wait(), max(0.0, 1 / self.fps - (loop.time() - started)))
+        except TimeoutError:
+          pass
+
+  def start(self, fps: Optional[float] = None):
+    """开始持续运行"""
+    self.fps = fps
+    if not self.running:
+      self._stop.clear()
+      self.run_task = asyncio.create_task(self._run_loop())
+
+  async def pause(self):
+    """暂停持续运行并中止进行中的 advance；不取消任务，而是等待当前步完成，避免工作线程中的步进与读取交错"""
+    self._epoch += 1
+    if self.running:
+      self._stop.set()
+      await self.run_task
+    self.run_task = None
+
+  async def destroy(self):
+    """停止一切步进，并等待工作线程中正在执行的一步结束"""
+    self.destroyed = True
+    await self.pause()
+    async with self.lock:
+      pass
+
+  def stats(self) -> Dict:
+    """运行状态统计"""
+    return {
+      'sim': self.id,
+      'width': self.ca.width,
+      'height': self.ca.height,
+      'generation': self.generation,
+      'population': int(np.count_nonzero(self.ca.grid)),
+      'running': self.running,
+      'fps': self.fps,
+      'rule': self.ca.rules,
+    }
+
+
+class SimulationServer:
+  """远程控制服务 - 每个请求在独立任务中处理，长耗时命令不会阻塞其他客户端"""
+
+  def __init__(self):
+    self.simulations: Dict[int, Simulation] = {}
+    self._next_id = 1
+    self.commands = {
+      'create': self.cmd_create,
+      'destroy': self.cmd_destroy,
+      'list': self.cmd_list,
+      'set_rule': self.cmd_set_rule,
+      'load_pattern': self.cmd_load_pattern,
+      'advance': self.cmd_advance,
+      'start': self.cmd_start,
+      'pause': self.cmd_pause,
+      'stats': self.cmd_stats,
+      'viewport': self.cmd_viewport,
+      'snapshot': self.cmd_snapshot,
+      'restore': self.cmd_restore,
+    }
+
+  def _get(self, request: Dict) -> Simulation:
+    sim_id = request.get('sim')
+    if sim_id not in self.simulations:
+      raise ValueError(f"模拟实例不存在: {sim_id}")
+    return self.simulations[sim_id]
+
+  async def cmd_create(self, request, payload):
+    """创建模拟实例"""
+    width = int(request.get('width', 50))
+    height = int(request.get('height', 50))
+    if not (1 <= width <= MAX_GRID_SIZE and 1 <= height <= MAX_GRID_SIZE):
+      raise ValueError(f"网格大小必须在1-{MAX_GRID_SIZE}之间")
+    sim = Simulation(self._next_id, width, height)
+    self._next_id += 1
+    if 'rule' in request:
+      sim.ca.set_rule(validate_rule(request['rule']))
+    self.simulations[sim.id] = sim
+    return {'sim': sim.id}, b''
+
+  async def cmd_destroy(self, request, payload):
+    """销毁模拟实例"""
+    sim = self._get(request)
+    del self.simulations[sim.id]
+    await sim.destroy()
+    return {}, b''
+
+  async def cmd_list(self, request, payload):
+    """列出所有模拟实例"""
+    return {'simulations': [sim.stats() for sim in self.simulations.values()]}, b''
+
+  async def cmd_set_rule(self, request, payload):
+    """设置规则"""
+    sim = self._get(request)
+    rule = validate_rule(request.get('rule'))
+    async with sim.lock:
+      sim.ca.set_rule(rule)
+    return {'rule': sim.ca.rules}, b''
+
+  async def cmd_load_pattern(self, request, payload):
+    """加载预设图案或坐标列表；默认先清空网格并居中放置"""
+    sim = self._get(request)
+    name = request.get('pattern')
+    if name == "随机":
+      pattern = None
+    elif name in PRESET_PATTERNS:
+      pattern = PRESET_PATTERNS[name]
+    elif 'cells' in request:
+      pattern = Pattern(request['cells'])
+    else:
+      raise ValueError(f"未知图案: {name}")
+
+    async with sim.lock:
+      ca = sim.ca
+      if pattern is None:
+        ca.randomize(density=float(request.get('density', 0.3)))
+      else:
+        if request.get('clear', True):
+          ca.grid = np.zeros((ca.height, ca.width), dtype=np.uint8)
+        x = request.get('x', (ca.width - pattern.width) // 2)
+        y = request.get('y', (ca.height - pattern.height) // 2)
+        pattern.stamp(
+          ca.grid, int(x), int(y),
+          transform=int(request.get('transform', 0)),
+          boundary=request.get('boundary', 'fixed')
+        )
+      sim.generation = 0
+    return sim.stats(), b''
+
+  async def cmd_advance(self, request, payload):
+    """推进N步，完成后返回"""
+    sim = self._get(request)
+    steps = int(request.get('steps', 1))
+    if steps < 0:
+      raise ValueError("步数不能为负数")
+    done = await sim.advance(steps)
+    return {**sim.stats(), 'steps_done': done, 'interrupted': done < steps}, b''
+
+  async def cmd_start(self, request, payload):
+    """开始持续运行"""
+    sim = self._get(request)
+    fps = request.get('fps')
+    if fps is not None:
+      fps = float(fps)
+      if not fps > 0:
+        raise ValueError("fps必须为正数")
+    sim.start(fps)
+    return sim.stats(), b''
+
+  async def cmd_pause(self, request, payload):
+    """暂停运行"""
+    sim = self._get(request)
+    await sim.pause()
+    return sim.stats(), b''
+
+  async def cmd_stats(self, request, payload):
+    """查询统计"""
+    return self._get(request).stats(), b''
+
+  async def cmd_viewport(self, request, payload):
+    """获取矩形区域的网格数据"""
+    sim = self._get(request)
+    x = int(request.get('x', 0))
+    y = int(request.get('y', 0))
+    async with sim.lock:
+      width = int(request.get('width', sim.ca.width))
+      height = int(request.get('height', sim.ca.height))
+      if width <= 0 or height <= 0:
+        raise ValueError("视口宽高必须为正数")
+      if not (0 <= x < sim.ca.width and 0 <= y < sim.ca.height):
+        raise ValueError("视口起点超出网格")
+      header, data = pack_grid(sim.ca.grid[y:y + height, x:x + width])
+      header.update({'x': x, 'y': y, 'generation': sim.generation})
+    return header, data
+
+  async def cmd_snapshot(self, request, payload):
+    """完整快照：网格、规则与代数"""
+    sim = self._get(request)
+    async with sim.lock:
+      header, data = pack_grid(sim.ca.grid)
+      header.update({'rule': sim.ca.rules, 'generation': sim.generation})
+    return header, data
+
+  async def cmd_restore(self, request, payload):
+    """从快照恢复（载荷为按位打包的网格）"""
+    sim = self._get(request)
+    grid = unpack_grid(request, payload)
+    rule = validate_rule(request['rule']) if 'rule' in request else None
+    async with sim.lock:
+      if grid.shape != (sim.ca.height, sim.ca.width):
+        rules = sim.ca.rules
+        sim.ca = CellularAutomaton(grid.shape[1], grid.shape[0])
+        sim.ca.set_rule(rules)
+      if rule is not None:
+        sim.ca.set_rule(rule)
+      sim.ca.grid = grid
+      sim.generation = int(request.get('generation', 0))
+    return sim.stats(), b''
+
+  async def _handle_request(self, request: Dict, payload: bytes, writer: asyncio.StreamWriter, write_lock: asyncio.Lock):
+    """执行单个请求并写回响应"""
+    request_id = request.get('id')
+    try:
+      command = self.commands.get(request.get('cmd'))
+      if command is None:
+        raise ValueError(f"未知命令: {request.get('cmd')}")
+      header, data = await command(request, payload)
+      header = {'id': request_id, 'ok': True, **header}
+    except Exception as e:
+      header, data = {'id': request_id, 'ok': False, 'error': str(e)}, b''
+    async with write_lock:
+      try:
+        writer.write(encode_message(header, data))
+        await writer.drain()
+      except ConnectionError:
+        pass
+
+  async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """处理一个客户端连接，请求可流水线发送，响应以id对应"""
+    write_lock = asyncio.Lock()
+    tasks = set()
+    try:
+      while True:
+        try:
+          request, payload = await read_message(reader)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+          # 连接关闭或协议错误（JSONDecodeError 也是 ValueError），不再读取
+          break
+        task = asyncio.create_task(self._handle_request(request, payload, writer, write_lock))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+      if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+      writer.close()
+
+  async def start(self, unix_path: Optional[str] = None, host: str = '127.0.0.1', port: int = 8765) -> asyncio.Server:
+    """开始监听，返回 asyncio.Server"""
+    if unix_path:
+      return await asyncio.start_unix_server(self.handle_client, path=unix_path)
+    return await asyncio.start_server(self.handle_client, host=host, port=port)
+
+  async def serve(self, unix_path: Optional[str] = None, host: str = '127.0.0.1', port: int = 8765):
+    """启动服务并一直运行"""
+    server = await self.start(unix_path, host, port)
+    async with server:
+      await server.serve_forever()
+
+
+class RemoteClient:
+  """远程控制客户端"""
+
+  def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    self.reader = reader
+    self.writer = writer
+    self._next_id = 1
+    self._pending: Dict[int, asyncio.Future] = {}
+    self._error = "连接已关闭"
+    self._reader_task = asyncio.create_task(self._read_loop())
+
+  @classmethod
+  async def connect_unix(cls, path: str) -> 'RemoteClient':
+    return cls(*await asyncio.open_unix_connection(path))
+
+  @classmethod
+  async def connect_tcp(cls, host: str = '127.0.0.1', port: int = 8765) -> 'RemoteClient':
+    return cls(*await asyncio.open_connection(host, port))
+
+  async def _read_loop(self):
+    """按id将响应分发给等待中的请求；连接结束后让所有等待中的请求失败"""
+    try:
+      while True:
+        header, payload = await read_message(self.reader)
+        future = self._pending.pop(header.get('id'), None)
+        if future is not None and not future.done():
+          future.set_result((header, payload))
+    except Exception as e:
+      self._error = f"连接已断开: {e}"
+    finally:
+      for future in self._pending.values():
+        if not future.done():
+          future.set_exception(ConnectionError(self._error))
+      self._pending.clear()
+
+  async def request(self, cmd: str, payload: bytes = b'', **params) -> Tuple[Dict, bytes]:
+    """发送命令并等待响应，失败时抛出RuntimeError，连接已断开时抛出ConnectionError"""
+    if self._reader_task.done():
+      raise ConnectionError(self._error)
+    request_id = self._next_id
+    self._next_id += 1
+    future = asyncio.get_running_loop().create_future()
+    self._pending[request_id] = future
+    try:
+      self.writer.write(encode_message({'id': request_id, 'cmd': cmd, **params}, payload))
+      await self.writer.drain()
+    except BaseException:
+      self._pending.pop(request_id, None)
+      raise
+    header, data = await future
+    if not header.get('ok'):
+      raise RuntimeError(header.get('error'))
+    return header, data
+
+  async def close(self):
+    self.writer.close()
+    await self.writer.wait_closed()
+    self._reader_task.cancel()
+
+
+def main():
+  parser = argparse.ArgumentParser(description="元胞自动机远程控制服务")
+  parser.add_argument('--unix', help="Unix套接字路径")
+  parser.add_argument('--host', default='127.0.0.1', help="监听地址")
+  parser.add_argument('--port', type=int, default=8765, help="监听端口")
+  args = parser.parse_args()
+  try:
+    asyncio.run(SimulationServer().serve(args.unix, args.host, args.port))
+  except KeyboardInterrupt:
+    pass
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from census import PatternLibrary, canonical_key, census
+
+
+def _variants(array):
+  """形状的8种旋转/镜像"""
+  for k in range(4):
+    rotated = np.rot90(array, k)
+    yield rotated
+    yield rotated[:, ::-1]
+
+
+@pytest.mark.parametrize('cells', [
+  [[0, 1, 0], [0, 0, 1], [1, 1, 1]],
+  [[1, 1, 0], [1, 0, 1], [0, 1, 0]],
+  [[1, 0, 0, 0], [1, 1, 1, 1]],
+])
+def test_canonical_key_invariant_under_transforms(cells):
+  array = np.array(cells, dtype=bool)
+  keys = {canonical_key(variant) for variant in _variants(array)}
+  assert len(keys) == 1
+
+
+def test_canonical_key_distinguishes_shapes():
+  block = np.ones((2, 2), dtype=bool)
+  blinker = np.ones((1, 3), dtype=bool)
+  assert canonical_key(block) != canonical_key(blinker)
+
+
+def test_census_counts_hand_built_board():
+  grid = np.zeros((40, 40), dtype=np.uint8)
+  # 两个方块
+  grid[2:4, 2:4] = 1
+  grid[30:32, 10:12] = 1
+  # 横向和纵向的眨眼
+  grid[10, 20:23] = 1
+  grid[25:28, 35] = 1
+  # 镜像滑翔机
+  for x, y in [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]:
+    grid[15 + y, 8 - x] = 1
+  # 蜂巢
+  for x, y in [(1, 0), (2, 0), (0, 1), (3, 1), (1, 2), (2, 2)]:
+    grid[33 + y, 25 + x] = 1
+  # 无法识别的对象
+  grid[5:9, 30] = 1
+  grid[5, 31] = 1
+
+  result = census(grid, with_objects=True)
+  assert result['objects_total'] == 7
+  assert result['counts'] == {'方块': 2, '眨眼': 2, '滑翔机': 1, '蜂巢': 1, '未知': 1}
+  block = next(obj for obj in result['objects'] if obj['x'] == 2 and obj['y'] == 2)
+  assert block == {'name': '方块', 'x': 2, 'y': 2, 'width': 2, 'height': 2, 'population': 4}
+
+
+def test_census_empty_grid():
+  assert census(np.zeros((8, 8), dtype=np.uint8)) == {'objects_total': 0, 'counts': {}}
+
+
+def test_library_registers_all_phases(tmp_path):
+  path = tmp_path / 'lwss.rle'
+  path.write_text("x = 5, y = 4, rule = B3/S23\nbo2bo$o4b$o3bo$4o!\n", encoding='utf-8')
+  library = PatternLibrary()
+  assert library.add_file(str(path))
+  # 轻型飞船有两种不同形状的相位
+  assert len(set(library.index.values())) == 1
+  assert len(library.index) == 2
+
+  grid = np.zeros((20, 20), dtype=np.uint8)
+  for x, y in [(1, 0), (4, 0), (0, 1), (0, 2), (4, 2), (0, 3), (1, 3), (2, 3), (3, 3)]:
+    grid[5 + y, 5 + x] = 1
+  assert census(grid, library)['counts'] == {'lwss': 1}
+
+
+def test_large_objects_are_unknown():
+  assert canonical_key(np.ones((1, 300), dtype=bool)) == canonical_key(np.ones((300, 1), dtype=bool))
+
+  grid = np.zeros((320, 320), dtype=np.uint8)
+  # 宽超过255格的横线，以及更大的实心块
+  grid[2, 5:305] = 1
+  grid[20:300, 20:300] = 1
+  grid[310:312, 310:312] = 1
+  result = census(grid)
+  assert result['counts'] == {'未知': 2, '方块': 1}
+
+  library = PatternLibrary()
+  assert library.add('长线', [(x, 0) for x in range(400)])
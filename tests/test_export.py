@@ -0,0 +1,146 @@
+import io
+
+import numpy as np
+import pytest
+
+from cell_core import CellularAutomaton
+from export import FrameRenderer, GifWriter, RawFrameWriter, export_run
+
+
+class KeepOpen(io.BytesIO):
+  """close后仍可读取内容"""
+
+  def close(self):
+    pass
+
+
+def _lzw_decode(data: bytes, min_code_size: int) -> bytes:
+  """GIF LZW解码，仅用于校验编码器"""
+  clear_code = 1 << min_code_size
+  end_code = clear_code + 1
+  bits = int.from_bytes(data, 'little')
+  pos = 0
+  out = bytearray()
+  table = []
+  code_size = min_code_size + 1
+  prev = None
+  while True:
+    code = (bits >> pos) & ((1 << code_size) - 1)
+    pos += code_size
+    if code == clear_code:
+      table = [bytes((i,)) for i in range(clear_code)] + [b'', b'']
+      code_size = min_code_size + 1
+      prev = None
+      continue
+    if code == end_code:
+      return bytes(out)
+    if code < len(table):
+      entry = table[code]
+      if prev is not None:
+        table.append(prev + entry[:1])
+    else:
+      entry = prev + prev[:1]
+      table.append(entry)
+    out += entry
+    prev = entry
+    if len(table) == (1 << code_size) and code_size < 12:
+      code_size += 1
+
+
+def decode_gif(data: bytes):
+  """解析GIF，返回(宽, 高, 调色板, 帧列表)"""
+  assert data[:6] == b'GIF89a'
+  width = int.from_bytes(data[6:8], 'little')
+  height = int.from_bytes(data[8:10], 'little')
+  table_size = 2 << (data[10] & 0x07)
+  palette = [tuple(data[13 + 3 * i:16 + 3 * i]) for i in range(table_size)]
+  pos = 13 + 3 * table_size
+  frames = []
+  while data[pos] != 0x3B:
+    if data[pos] == 0x21:
+      pos += 2
+      while data[pos]:
+        pos += data[pos] + 1
+      pos += 1
+    elif data[pos] == 0x2C:
+      w = int.from_bytes(data[pos + 5:pos + 7], 'little')
+      h = int.from_bytes(data[pos + 7:pos + 9], 'little')
+      min_code_size = data[pos + 10]
+      pos += 11
+      blocks = bytearray()
+      while data[pos]:
+        blocks += data[pos + 1:pos + 1 + data[pos]]
+        pos += data[pos] + 1
+      pos += 1
+      pixels = _lzw_decode(bytes(blocks), min_code_size)
+      frames.append(np.frombuffer(pixels, dtype=np.uint8).reshape(h, w))
+    else:
+      raise AssertionError(f"unexpected block {data[pos]:#x}")
+  return width, height, palette, frames
+
+
+def test_gif_round_trip():
+  rng = np.random.default_rng(0)
+  # 随机噪声帧足够大，会触发码表满后的清除码
+  frames = [(rng.random((120, 150)) < p).astype(np.uint8) for p in (0.1, 0.5, 0.9)]
+  out = KeepOpen()
+  writer = GifWriter(out, delay_ms=50)
+  for frame in frames:
+    writer.write_frame(frame)
+  writer.close()
+
+  width, height, palette, decoded = decode_gif(out.getvalue())
+  assert (width, height) == (150, 120)
+  assert palette[:2] == [(255, 255, 255), (0, 0, 0)]
+  assert len(decoded) == len(frames)
+  for expected, actual in zip(frames, decoded):
+    np.testing.assert_array_equal(expected, actual)
+
+
+def test_export_run_matches_grid():
+  ca = CellularAutomaton(20, 16)
+  ca.randomize(density=0.4)
+  expected = [ca.grid.copy()]
+  reference = CellularAutomaton(20, 16)
+  reference.grid = ca.grid.copy()
+  for _ in range(4):
+    reference.step()
+    expected.append(reference.grid.copy())
+
+  out = KeepOpen()
+  written = export_run(ca, 4, GifWriter(out), every=2, scale=2)
+  _, _, _, decoded = decode_gif(out.getvalue())
+  assert written == len(decoded) == 3
+  for grid, frame in zip(expected[::2], decoded):
+    np.testing.assert_array_equal(np.kron(grid > 0, np.ones((2, 2))), frame)
+
+
+def test_region_outside_grid_is_padded():
+  grid = np.ones((10, 10), dtype=int)
+  frame = FrameRenderer(region=(-2, 8, 5, 4)).render(grid)
+  assert frame.shape == (4, 5)
+  assert frame.sum() == 3 * 2
+  assert FrameRenderer(region=(50, 50, 3, 3)).render(grid).shape == (3, 3)
+
+
+def test_renderer_rejects_bad_scale():
+  with pytest.raises(ValueError):
+    FrameRenderer(scale=1.5)
+  with pytest.raises(ValueError):
+    FrameRenderer(scale=0)
+
+
+def test_raw_writer_gray():
+  out = KeepOpen()
+  writer = RawFrameWriter(out)
+  writer.write_frame(np.array([[0, 1], [1, 0]], dtype=np.uint8))
+  writer.close()
+  assert out.getvalue() == bytes([255, 0, 0, 255])
+
+
+@pytest.mark.parametrize('kwargs', [{'every': 0}, {'queue_size': 0}, {'scale': 0}, {'region': (0, 0, 0, 5)}])
+def test_export_run_closes_writer_on_bad_arguments(tmp_path, kwargs):
+  writer = GifWriter(str(tmp_path / 'out.gif'))
+  with pytest.raises(ValueError):
+    export_run(CellularAutomaton(8, 8), 1, writer, **kwargs)
+  assert writer.stream.closed
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from patterns import BLINKER, GLIDER, Patterns, evolve_array, parse_rle
+
+
+def _cells(grid):
+  return {(int(x), int(y)) for y, x in np.argwhere(grid)}
+
+
+def test_legacy_create_matches_stamp():
+  legacy = np.zeros((20, 20), dtype=np.uint8)
+  Patterns.create_glider(legacy, 18, 3, 20, 20)
+  stamped = np.zeros((20, 20), dtype=np.uint8)
+  GLIDER.stamp(stamped, 18, 3)
+  np.testing.assert_array_equal(legacy, stamped)
+  assert legacy.sum() == 2
+
+
+def test_variants_are_rotations_and_reflections():
+  base = {tuple(c) for c in GLIDER.variant(0).tolist()}
+  assert base == {(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)}
+  shapes = {frozenset(map(tuple, GLIDER.variant(t).tolist())) for t in range(8)}
+  assert len(shapes) == 8
+  for t in range(8):
+    assert GLIDER.variant(t).min() == 0 and GLIDER.variant(t).max() == 2
+
+
+def test_phase_matches_evolution():
+  array = np.zeros((3, 3), dtype=bool)
+  cells = GLIDER.variant(0)
+  array[cells[:, 1], cells[:, 0]] = True
+  # 滑翔机4代后沿对角线平移一格
+  assert {tuple(c) for c in GLIDER.variant(0, 4).tolist()} == {(x + 1, y + 1) for x, y in GLIDER.cells.tolist()}
+  assert evolve_array(array, generations=4).sum() == 5
+
+
+def test_stamp_many_bulk_placement():
+  grid = np.zeros((64, 64), dtype=np.uint8)
+  positions = [(x, y) for x in range(2, 60, 8) for y in range(2, 60, 8)]
+  GLIDER.stamp_many(grid, positions, transforms=np.arange(len(positions)) % 8, phases=np.arange(len(positions)) % 4)
+  assert grid.sum() == 5 * len(positions)
+
+
+def test_stamp_boundary_modes():
+  grid = np.zeros((10, 10), dtype=np.uint8)
+  BLINKER.stamp(grid, 8, 8)
+  assert _cells(grid) == {(9, 8), (9, 9)}
+
+  grid = np.zeros((10, 10), dtype=np.uint8)
+  BLINKER.stamp(grid, 8, 8, boundary='wrap')
+  assert _cells(grid) == {(9, 8), (9, 9), (9, 0)}
+
+  with pytest.raises(ValueError):
+    BLINKER.stamp(grid, 0, 0, boundary='mirror')
+
+
+@pytest.mark.parametrize('transforms, phases', [(8, 0), (-1, 0), ([0, 9], 0), (0, -1)])
+def test_stamp_many_rejects_bad_transform_or_phase(transforms, phases):
+  grid = np.zeros((10, 10), dtype=np.uint8)
+  with pytest.raises(ValueError):
+    GLIDER.stamp_many(grid, [(1, 1), (5, 5)], transforms=transforms, phases=phases)
+  assert grid.sum() == 0
+
+
+def test_parse_rle():
+  assert parse_rle("#C glider\nx = 3, y = 3, rule = B3/S23\nbo$2bo$3o!") == [(1, 0), (2, 1), (0, 2), (1, 2), (2, 2)]
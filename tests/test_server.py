@@ -0,0 +1,229 @@
+import asyncio
+import struct
+
+import numpy as np
+import pytest
+
+from server import (
+  MAX_GRID_SIZE, RemoteClient, SimulationServer, encode_message, pack_grid, read_message, unpack_grid
+)
+
+
+def run_with_server(scenario):
+  """启动本机服务，运行 scenario(server, client, port)，结束后关闭"""
+
+  async def main():
+    server = SimulationServer()
+    listener = await server.start(port=0)
+    port = listener.sockets[0].getsockname()[1]
+    client = await RemoteClient.connect_tcp(port=port)
+    try:
+      await scenario(server, client, port)
+    finally:
+      await client.close()
+      for sim in list(server.simulations.values()):
+        await sim.destroy()
+      listener.close()
+      await listener.wait_closed()
+
+  asyncio.run(main())
+
+
+def test_pack_grid_round_trip():
+  grid = (np.random.default_rng(0).random((13, 21)) < 0.5).astype(np.uint8)
+  header, payload = pack_grid(grid)
+  assert header['shape'] == [13, 21]
+  assert len(payload) == (13 * 21 + 7) // 8
+  np.testing.assert_array_equal(unpack_grid(header, payload), grid)
+
+
+@pytest.mark.parametrize('shape, size', [
+  ([100000, 100000], 10),
+  ([0, 5], 1),
+  ([4, 4], 1),
+  ([4, 4], 3),
+  ('4x4', 2),
+])
+def test_unpack_grid_rejects_bad_input(shape, size):
+  with pytest.raises(ValueError):
+    unpack_grid({'shape': shape}, bytes(size))
+
+
+def test_create_advance_viewport_snapshot_restore():
+  async def scenario(server, client, port):
+    header, _ = await client.request('create', width=20, height=16)
+    sim = header['sim']
+    header, _ = await client.request('load_pattern', sim=sim, pattern='滑翔机', x=2, y=2)
+    assert header['population'] == 5
+
+    header, _ = await client.request('advance', sim=sim, steps=4)
+    assert (header['generation'], header['steps_done'], header['interrupted']) == (4, 4, False)
+
+    header, payload = await client.request('viewport', sim=sim, x=2, y=2, width=6, height=6)
+    view = unpack_grid(header, payload)
+    # 滑翔机4代后沿对角线平移一格
+    expected = np.zeros((6, 6), dtype=np.uint8)
+    for x, y in [(0, 1), (1, 2), (2, 0), (2, 1), (2, 2)]:
+      expected[y + 1, x + 1] = 1
+    np.testing.assert_array_equal(view, expected)
+
+    snapshot, payload = await client.request('snapshot', sim=sim)
+    assert snapshot['shape'] == [16, 20] and snapshot['generation'] == 4
+
+    header, _ = await client.request('create', width=5, height=5)
+    other = header['sim']
+    header, _ = await client.request(
+      'restore', payload, sim=other, shape=snapshot['shape'], rule=snapshot['rule'], generation=4
+    )
+    assert (header['width'], header['height'], header['population']) == (20, 16, 5)
+    _, restored = await client.request('snapshot', sim=other)
+    assert restored == payload
+
+  run_with_server(scenario)
+
+
+def test_restore_with_new_shape_keeps_rule():
+  async def scenario(server, client, port):
+    header, _ = await client.request('create', width=10, height=10)
+    sim = header['sim']
+    header, _ = await client.request('set_rule', sim=sim, rule='高生命')
+    rule = header['rule']
+    grid = np.zeros((16, 20), dtype=np.uint8)
+    params, payload = pack_grid(grid)
+    header, _ = await client.request('restore', payload, sim=sim, **params)
+    assert (header['width'], header['height']) == (20, 16)
+    assert header['rule'] == rule
+
+  run_with_server(scenario)
+
+
+def test_error_responses():
+  async def scenario(server, client, port):
+    header, _ = await client.request('create', width=10, height=10)
+    sim = header['sim']
+    bad_requests = [
+      ('bogus', b'', {}),
+      ('stats', b'', {'sim': 999}),
+      ('create', b'', {'width': MAX_GRID_SIZE + 1}),
+      ('set_rule', b'', {'sim': sim, 'rule': {'survive': [9]}}),
+      ('viewport', b'', {'sim': sim, 'width': -5}),
+      ('viewport', b'', {'sim': sim, 'x': 10}),
+      ('start', b'', {'sim': sim, 'fps': -1}),
+      ('restore', bytes(10), {'sim': sim, 'shape': [100000, 100000]}),
+      ('restore', bytes(2), {'sim': sim, 'shape': [10, 10]}),
+      ('advance', b'', {'sim': sim, 'steps': -1}),
+    ]
+    for cmd, payload, params in bad_requests:
+      with pytest.raises(RuntimeError):
+        await client.request(cmd, payload, **params)
+    # 出错后连接仍可用
+    header, _ = await client.request('stats', sim=sim)
+    assert header['generation'] == 0
+
+  run_with_server(scenario)
+
+
+def test_non_object_header_closes_connection():
+  async def scenario(server, client, port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = b'[1, 2]'
+    writer.write(struct.pack('>II', len(body), 0) + body)
+    await writer.drain()
+    assert await reader.read() == b''
+    writer.close()
+    # 其他客户端不受影响
+    header, _ = await client.request('list')
+    assert header['simulations'] == []
+
+  run_with_server(scenario)
+
+
+def test_request_fails_fast_after_disconnect():
+  async def scenario(server, client, port):
+    # 非对象头部使服务端断开这个客户端的连接
+    body = b'[]'
+    client.writer.write(struct.pack('>II', len(body), 0) + body)
+    await client.writer.drain()
+    await asyncio.wait_for(asyncio.shield(client._reader_task), 5)
+    for _ in range(2):
+      with pytest.raises(ConnectionError):
+        await asyncio.wait_for(client.request('list'), 5)
+
+  run_with_server(scenario)
+
+
+def test_malformed_response_fails_pending_requests():
+  async def reply_with_list(reader, writer):
+    await read_message(reader)
+    body = b'[1]'
+    writer.write(struct.pack('>II', len(body), 0) + body)
+    await writer.drain()
+
+  async def main():
+    listener = await asyncio.start_server(reply_with_list, '127.0.0.1', 0)
+    client = await RemoteClient.connect_tcp(port=listener.sockets[0].getsockname()[1])
+    try:
+      with pytest.raises(ConnectionError):
+        await asyncio.wait_for(client.request('list'), 5)
+      with pytest.raises(ConnectionError):
+        await asyncio.wait_for(client.request('list'), 5)
+    finally:
+      await client.close()
+      listener.close()
+      await listener.wait_closed()
+
+  asyncio.run(main())
+
+
+def test_pause_and_destroy_interrupt_advance():
+  async def scenario(server, client, port):
+    header, _ = await client.request('create', width=30, height=30)
+    sim = header['sim']
+    advance = asyncio.ensure_future(client.request('advance', sim=sim, steps=100000))
+    await asyncio.sleep(0.05)
+    await client.request('pause', sim=sim)
+    header, _ = await advance
+    assert header['interrupted'] and header['steps_done'] < 100000
+
+    advance = asyncio.ensure_future(client.request('advance', sim=sim, steps=100000))
+    await asyncio.sleep(0.05)
+    stopped = server.simulations[sim]
+    await client.request('destroy', sim=sim)
+    header, _ = await advance
+    assert header['interrupted']
+    generation = stopped.generation
+    await asyncio.sleep(0.05)
+    assert stopped.generation == generation
+    assert sim not in server.simulations
+
+  run_with_server(scenario)
+
+
+def test_start_and_concurrent_clients():
+  async def scenario(server, client, port):
+    header, _ = await client.request('create', width=20, height=20)
+    sim = header['sim']
+    await client.request('load_pattern', sim=sim, pattern='随机')
+    header, _ = await client.request('start', sim=sim, fps=200)
+    assert header['running']
+    others = [await RemoteClient.connect_tcp(port=port) for _ in range(10)]
+    try:
+      results = await asyncio.gather(*[other.request('stats', sim=sim) for other in others])
+      assert all(header['running'] for header, _ in results)
+    finally:
+      for other in others:
+        await other.close()
+    header, _ = await client.request('pause', sim=sim)
+    assert not header['running'] and header['generation'] > 0
+
+  run_with_server(scenario)
+
+
+def test_message_framing():
+  async def main():
+    reader = asyncio.StreamReader()
+    reader.feed_data(encode_message({'id': 1, 'cmd': 'list'}, b'\x01\x02'))
+    reader.feed_eof()
+    assert await read_message(reader) == ({'id': 1, 'cmd': 'list'}, b'\x01\x02')
+
+  asyncio.run(main())
@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+ENGINE_MODULES = ['cell_core', 'rules', 'patterns', 'census', 'export']
+FORBIDDEN_MODULES = ['scipy', 'tkinter']
+
+
+def test_engine_import_does_not_load_heavy_modules():
+  # 在新解释器中检查，测试进程本身可能已加载这些模块
+  code = (
+    "import sys\n"
+    f"import {', '.join(ENGINE_MODULES)}\n"
+    f"print(' '.join(m for m in {FORBIDDEN_MODULES!r} if m in sys.modules))"
+  )
+  result = subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR, check=True, capture_output=True, text=True)
+  assert result.stdout.split() == []